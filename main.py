@@ -1,23 +1,73 @@
 import http.server
-import socketserver
 import subprocess
 import os
 import yaml
 import shutil
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import parse_qs
 import re
-import gzip
+import zlib
+import io
+import threading
+import queue
+import time
+import select
+import array
+import socket
+import contextlib
+import functools
+
+# Prefer PyYAML's libyaml-based loader, which is much faster than the pure
+# Python one. It is only available when PyYAML was built against libyaml.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# os.splice lets git output go from its pipe to the client socket without a
+# copy through Python. It and the FIONREAD ioctl are Linux-only.
+try:
+    import fcntl
+    import termios
+    HAVE_SPLICE = hasattr(os, 'splice')
+except ImportError:
+    HAVE_SPLICE = False
+
+# Size of the reads used when relaying git output to the client.
+READ_BUFFER_SIZE = 128 * 1024
 
 # --- Load Configuration ---
+@functools.lru_cache(maxsize=8)
+def _parse_config(path, mtime_ns, size):
+    """Parses a config file. The mtime and size only serve as cache key."""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+def load_config(path):
+    """
+    Loads the YAML config at path, reusing the parsed result as long as the
+    file's mtime and size are unchanged. The returned dict is shared between
+    callers and must not be modified.
+    """
+    st = os.stat(path)
+    return _parse_config(path, st.st_mtime_ns, st.st_size)
+
 # Determine config file path from environment variable or use default
 config_path = os.getenv('GIT_SERVER_CFG', 'config.yaml')
 print(f"Attempting to load configuration from: {config_path}")
 
 try:
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(config_path)
     HOST = config['server']['host']
     PORT = config['server']['port']
+    # Optional size in bytes for the kernel send buffer of client connections.
+    SEND_BUFFER_SIZE = config['server'].get('send_buffer_size')
+    # Seconds an idle keep-alive connection may wait for its next request.
+    KEEPALIVE_TIMEOUT = config['server'].get('keepalive_timeout', 60)
+    # Optional limit on how many git operations may run at the same time.
+    MAX_GIT_PROCESSES = config['server'].get('max_git_processes')
+    # Capacity in bytes requested for the pipe carrying git's output while it
+    # is relayed (Linux only). 0 keeps the kernel default.
+    PIPE_BUFFER_SIZE = config['server'].get('pipe_buffer_size', 256 * 1024)
     REPOS_CONFIG = config['repositories']
     # Create a mapping from repo name to repo path for quick lookups
     REPO_MAP = {repo['name']: repo['path'] for repo in REPOS_CONFIG}
@@ -66,17 +116,16 @@ def setup_repositories(repos):
                 print(f"-> Repository not found. Creating new empty bare repository...")
                 command = ['git', 'init', '--bare', repo_path]
 
-            result = subprocess.run(
-                command, check=True, capture_output=True, text=True
-            )
+            # Output is kept as bytes; only the part that is printed gets decoded.
+            result = subprocess.run(command, check=True, capture_output=True)
             # Git clone often prints progress to stderr, so we show it if available.
             output = result.stdout.strip() or result.stderr.strip()
-            print(f"-> {output}")
+            print(f"-> {output.decode('utf-8', errors='ignore')}")
             print(f"-> Repository '{repo_name}' setup successfully.")
 
         except subprocess.CalledProcessError as e:
             print(f"!! Failed to set up repository '{repo_name}'. Git command failed:")
-            print(e.stderr)
+            print(e.stderr.decode('utf-8', errors='ignore'))
             return False
         except Exception as e:
             print(f"!! An unexpected error occurred while setting up '{repo_name}': {e}")
@@ -85,34 +134,432 @@ def setup_repositories(repos):
     print("--- Repository setup complete ---\n")
     return True
 
+# --- Git Process Management ---
+# Resolved once so the git service processes can be started with
+# posix_spawn, which subprocess only uses for an absolute executable path.
+GIT_EXECUTABLE = shutil.which('git') or 'git'
+
+def _git_command(service_name, command_options, repo_path):
+    """Builds the command line for a stateless git service such as 'git-upload-pack'."""
+    return [GIT_EXECUTABLE, service_name.replace('git-', ''), '--stateless-rpc'] + command_options + [repo_path]
+
+def _spawn_git(command):
+    """Starts a git process with unbuffered pipes for stdin, stdout and stderr."""
+    # close_fds=False is another requirement for posix_spawn. It is safe here
+    # because Python creates its file descriptors non-inheritable.
+    return subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0,
+        close_fds=False
+    )
+
+def _grow_pipe(pipe):
+    """
+    Raises the capacity of a pipe to PIPE_BUFFER_SIZE. A larger pipe lets git
+    run further ahead of a slow client and lets each splice move more data.
+    Linux charges pipe capacity against fs.pipe-user-pages-soft, so this is
+    only done for pipes that are actively carrying a response.
+    """
+    if not (HAVE_SPLICE and PIPE_BUFFER_SIZE):
+        return
+    try:
+        fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+    except OSError:
+        pass  # Over pipe-max-size or the per-user limit; keep the current size.
+
+def _refs_fingerprint(repo_path):
+    """
+    Returns a value that changes whenever the refs of a repository change, or
+    the repository config and alternates that shape what git advertises.
+    Git updates these files and loose refs by renaming a lock file into
+    place, so the inode and mtime of those files capture every update.
+    """
+    entries = []
+    for name in ('HEAD', 'packed-refs', 'config', os.path.join('objects', 'info', 'alternates')):
+        try:
+            st = os.stat(os.path.join(repo_path, name))
+            entries.append((name, st.st_ino, st.st_mtime_ns))
+        except FileNotFoundError:
+            entries.append((name, 0, 0))
+
+    pending = [os.path.join(repo_path, 'refs')]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    st = entry.stat(follow_symlinks=False)
+                    entries.append((entry.path, st.st_ino, st.st_mtime_ns))
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+        except FileNotFoundError:
+            # A ref was deleted while we were looking at it.
+            entries.append(None)
+    return tuple(entries)
+
+def _discard(proc):
+    """Kills an unused git process and reaps it."""
+    proc.kill()
+    proc.communicate()
+
+class GitProcessPool:
+    """
+    Keeps pre-spawned git service processes per repository, so a request can
+    skip the fork/exec and git startup. upload-pack reads the refs as soon
+    as it starts, so an idle process is only handed out while the refs still
+    match the ones it saw, and is killed after idling for idle_timeout seconds.
+    """
+    def __init__(self, max_idle=1, idle_timeout=300):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # (service_name, repo_path) -> [(spawned_at, fingerprint, proc, expiry_timer)]
+        self._idle = {}
+        # (service_name, repo_path) -> number of spawns in progress
+        self._spawning = {}
+
+    def acquire(self, service_name, repo_path):
+        """Returns an unused process for the service, spawning one if none is ready."""
+        key = (service_name, repo_path)
+        fingerprint = _refs_fingerprint(repo_path)
+        now = time.monotonic()
+        found = None
+        stale = []
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle and not found:
+                spawned_at, spawned_fingerprint, proc, timer = idle.pop()
+                timer.cancel()
+                if (spawned_fingerprint == fingerprint
+                        and now - spawned_at < self.idle_timeout
+                        and proc.poll() is None):
+                    found = proc
+                else:
+                    stale.append(proc)
+        for proc in stale:
+            _discard(proc)
+        return found or _spawn_git(_git_command(service_name, [], repo_path))
+
+    def replenish(self, service_name, repo_path):
+        """Spawns idle processes for the service until max_idle are waiting."""
+        key = (service_name, repo_path)
+        while True:
+            # Reserve the slot under the lock, so concurrent responses for the
+            # same repository cannot overfill the pool.
+            with self._lock:
+                waiting = len(self._idle.get(key, ())) + self._spawning.get(key, 0)
+                if waiting >= self.max_idle:
+                    return
+                self._spawning[key] = self._spawning.get(key, 0) + 1
+
+            proc = None
+            try:
+                # Take the fingerprint before spawning, so a ref update racing
+                # with git's startup makes the process look stale, not fresh.
+                fingerprint = _refs_fingerprint(repo_path)
+                proc = _spawn_git(_git_command(service_name, [], repo_path))
+            except OSError as e:
+                print(f"Could not pre-spawn '{service_name}' for '{repo_path}': {e}")
+            finally:
+                with self._lock:
+                    self._spawning[key] -= 1
+                    if proc:
+                        # Kill the process once it has idled too long, even if
+                        # the repository is never fetched again. acquire
+                        # cancels the timer when it takes the process.
+                        timer = threading.Timer(self.idle_timeout, self._expire, args=(key, proc))
+                        timer.daemon = True
+                        timer.start()
+                        self._idle.setdefault(key, []).append((time.monotonic(), fingerprint, proc, timer))
+            if not proc:
+                return
+
+    def _expire(self, key, proc):
+        """Removes proc from the idle processes for key, if still there, and kills it."""
+        with self._lock:
+            idle = self._idle.get(key, [])
+            entries = [entry for entry in idle if entry[2] is proc]
+            for entry in entries:
+                idle.remove(entry)
+        if entries:
+            _discard(proc)
+
+# Only upload-pack is pooled: it makes up the bulk of the traffic and, unlike
+# receive-pack, never changes the repository.
+GIT_PROCESS_POOL = GitProcessPool()
+
+# Bounds the number of concurrently running git operations. Requests beyond
+# the limit wait for a slot, which keeps memory use in check when many large
+# clones arrive at once. Health probes are not affected.
+GIT_PROCESS_SLOTS = threading.BoundedSemaphore(MAX_GIT_PROCESSES) if MAX_GIT_PROCESSES else contextlib.nullcontext()
+
+def _service_prelude(service_name):
+    """Builds the pkt-line '# service=...' header that starts a ref advertisement."""
+    header = f'# service={service_name}\n'
+    return f'{len(header) + 4:04x}{header}0000'.encode('utf-8')
+
+# Advertisement headers for the services the server offers, built once.
+_SERVICE_PRELUDE = {service: _service_prelude(service) for service in ('git-upload-pack', 'git-receive-pack')}
+
+# upload-pack ref advertisement bodies by (repo_path, service_name), stored as (fingerprint, body).
+_ADVERTISEMENT_CACHE = {}
+# One lock per cache key, so that when the refs change only one request runs
+# git while the others wait for its result.
+_ADVERTISEMENT_LOCKS = {}
+_ADVERTISEMENT_LOCKS_GUARD = threading.Lock()
+
+def _advertisement_lock(key):
+    """Returns the lock serialising cache refreshes for key."""
+    with _ADVERTISEMENT_LOCKS_GUARD:
+        if key not in _ADVERTISEMENT_LOCKS:
+            _ADVERTISEMENT_LOCKS[key] = threading.Lock()
+        return _ADVERTISEMENT_LOCKS[key]
+
+def _run_advertise_refs(repo_path, service_name):
+    """Runs `git <service> --advertise-refs` and returns the full info/refs body."""
+    command = _git_command(service_name, ['--advertise-refs'], repo_path)
+    with GIT_PROCESS_SLOTS:
+        proc = _spawn_git(command)
+        stdout, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command, stdout, stderr)
+    return _SERVICE_PRELUDE[service_name] + stdout
+
+def advertise_refs(repo_path, service_name):
+    """
+    Returns the info/refs response body for a service: its '# service=' header
+    followed by the output of `git <service> --advertise-refs`. For
+    upload-pack the body only depends on the refs and repository config, so
+    it is cached and reused until _refs_fingerprint reports a change. Raises
+    subprocess.CalledProcessError if git fails.
+    """
+    if service_name != 'git-upload-pack':
+        # receive-pack advertises per-request data such as a fresh push-cert
+        # nonce, so its advertisement must never be reused.
+        return _run_advertise_refs(repo_path, service_name)
+
+    key = (repo_path, service_name)
+    fingerprint = _refs_fingerprint(repo_path)
+    cached = _ADVERTISEMENT_CACHE.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    with _advertisement_lock(key):
+        # Another request may have refreshed the entry while we waited.
+        cached = _ADVERTISEMENT_CACHE.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        body = _run_advertise_refs(repo_path, service_name)
+        # The fingerprint was taken before git read the refs, so an update in
+        # between only makes this entry look stale on the next request.
+        _ADVERTISEMENT_CACHE[key] = (fingerprint, body)
+        return body
+
 # --- Git Server Logic ---
+# Content-Length is a plain decimal number; int() would also accept signs,
+# underscores and whitespace.
+_CONTENT_LENGTH_RE = re.compile(r'[0-9]+')
+
+class _RequestBody(io.RawIOBase):
+    """A readable stream over a request body that stops after Content-Length bytes."""
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    @property
+    def remaining(self):
+        """Number of body bytes that have not been read yet."""
+        return self._remaining
+
+    def readinto(self, buffer):
+        if not self._remaining:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        n = self._rfile.readinto(view) or 0
+        # A client that disconnects early simply ends the body.
+        self._remaining = n and self._remaining - n
+        return n
+
+class _BadChunkedBody(Exception):
+    """Raised when a chunked request body is malformed or cut short."""
+
+_CHUNK_SIZE_RE = re.compile(rb'[0-9A-Fa-f]{1,16}')
+
+class _ChunkedRequestBody(io.RawIOBase):
+    """
+    A readable stream that decodes a 'Transfer-Encoding: chunked' request
+    body. Git sends bodies larger than its http.postBuffer this way.
+    """
+    def __init__(self, rfile):
+        self._rfile = rfile
+        self._chunk_left = 0
+        self._done = False
+
+    def readable(self):
+        return True
+
+    @property
+    def remaining(self):
+        """True until the terminating chunk has been read."""
+        return not self._done
+
+    def readinto(self, buffer):
+        if self._done:
+            return 0
+        if not self._chunk_left:
+            line = self._rfile.readline(1024)
+            # int() alone would also accept signs, underscores and a 0x prefix.
+            size_field = line.split(b';', 1)[0].strip()
+            if not _CHUNK_SIZE_RE.fullmatch(size_field):
+                raise _BadChunkedBody(f"Invalid chunk size line {line[:40]!r}")
+            size = int(size_field, 16)
+            if size == 0:
+                # Skip any trailer fields up to the blank line ending the body.
+                while (line := self._rfile.readline(65537)) not in (b'\r\n', b'\n'):
+                    if not line:
+                        raise _BadChunkedBody("Request body ended in the trailer")
+                self._done = True
+                return 0
+            self._chunk_left = size
+
+        view = memoryview(buffer)[:self._chunk_left]
+        n = self._rfile.readinto(view)
+        if not n:
+            raise _BadChunkedBody("Request body ended in the middle of a chunk")
+        self._chunk_left -= n
+        if not self._chunk_left and self._rfile.readline(3) not in (b'\r\n', b'\n'):
+            raise _BadChunkedBody("Missing CRLF after chunk data")
+        return n
+
+# Spare READ_BUFFER_SIZE buffers, shared by all requests so that reading
+# request bodies does not allocate a fresh buffer for every read.
+_READ_BUFFERS = queue.SimpleQueue()
+
+def _acquire_read_buffer():
+    """Takes a spare read buffer, allocating one if none is available."""
+    try:
+        return _READ_BUFFERS.get_nowait()
+    except queue.Empty:
+        return bytearray(READ_BUFFER_SIZE)
+
+# Most bytes read after the end of a gzip body before giving up on it.
+_MAX_TRAILING_BYTES = 64 * 1024
+
+class _GzipBody:
+    """
+    Inflates a gzipped request body as it is read. Compressed data is read
+    into a pooled buffer which is handed back when the body is closed.
+    """
+    def __init__(self, raw):
+        self._raw = raw
+        self._buffer = _acquire_read_buffer()
+        # zlib objects cannot be reset from Python; a new one is cheap
+        # compared to reallocating the buffers around it.
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def read(self, size):
+        inflater = self._inflater
+        while not inflater.eof:
+            if inflater.unconsumed_tail:
+                data = inflater.decompress(inflater.unconsumed_tail, size)
+            else:
+                n = self._raw.readinto(self._buffer)
+                if not n:
+                    raise EOFError("Compressed request body ended before the end-of-stream marker")
+                data = inflater.decompress(memoryview(self._buffer)[:n], size)
+            if data:
+                return data
+        self._drain()
+        return b''
+
+    def _drain(self):
+        """
+        Reads what follows the end of the gzip stream, such as the final chunk
+        of a chunked body, so the connection can be reused. Gives up after
+        _MAX_TRAILING_BYTES and leaves the caller to close the connection.
+        """
+        drained = 0
+        while drained < _MAX_TRAILING_BYTES and (n := self._raw.readinto(self._buffer)):
+            drained += n
+
+    def close(self):
+        if self._buffer is not None:
+            _READ_BUFFERS.put(self._buffer)
+            self._buffer = None
+
+def _pump(source, proc, errors):
+    """
+    Copies the source stream into the stdin of a git process and closes it.
+    If reading the source fails, the error is added to errors and git is
+    killed, so it never acts on a truncated request.
+    """
+    try:
+        while source and (data := source.read(READ_BUFFER_SIZE)):
+            view = memoryview(data)
+            while view:
+                view = view[proc.stdin.write(view):]
+    except BrokenPipeError:
+        pass
+    except Exception as e:
+        errors.append(e)
+        proc.kill()
+    finally:
+        if source:
+            source.close()
+        proc.stdin.close()
+
 class GitHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
     """
     A request handler that serves multiple Git repositories over HTTP,
     including health check endpoints.
     """
-    def get_repo_path(self):
-        """Parses the request URL to find the repo name and get its disk path."""
+    # HTTP/1.1 lets git reuse the connection across the requests of a fetch
+    # or push, and allows streaming responses with chunked encoding.
+    protocol_version = 'HTTP/1.1'
+    # Sets TCP_NODELAY, so small responses like ref advertisements and the
+    # tail of a pack are not held back by Nagle's algorithm.
+    disable_nagle_algorithm = True
+
+    def handle_one_request(self):
+        # With keep-alive, each connection holds a thread while it waits for
+        # the next request, so that wait is bounded. A timeout makes the
+        # socket non-blocking, which splice cannot use, so it only applies
+        # until the request line and headers have been read.
+        self.connection.settimeout(KEEPALIVE_TIMEOUT)
+        super().handle_one_request()
+
+    def parse_request(self):
+        try:
+            return super().parse_request()
+        finally:
+            self.connection.settimeout(None)
+
+    def get_repo_path(self, path):
+        """Parses the request path to find the repo name and get its disk path."""
         # The first part of the path is the repo name. e.g., /my-repo/info/refs
-        match = re.match(r'^/([^/]+)', self.path)
-        if not match:
+        parts = path.split('/', 2)
+        if len(parts) < 2 or parts[0] or not parts[1]:
             return None, "Invalid repository URL."
 
-        repo_name = match.group(1)
+        repo_name = parts[1]
+        # setup_repositories created every configured repository at startup,
+        # so there is no need to check the disk on each request.
         repo_path = REPO_MAP.get(repo_name)
-        
-        if not repo_path or not os.path.isdir(repo_path):
+        if not repo_path:
             return None, f"Repository '{repo_name}' not found on server."
         
         return repo_path, None
 
     def _send_text_response(self, status_code, message):
         """Sends a simple plain text response."""
+        body = message.encode('utf-8')
         self.send_response(status_code)
         self.send_header('Content-Type', 'text/plain; charset=utf-8')
-        self.send_header('Content-Length', str(len(message)))
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(message.encode('utf-8'))
+        self.wfile.write(body)
 
     def _send_headers(self, status_code, content_type, extra_headers=None):
         """Send common headers for a Git HTTP response."""
@@ -126,26 +573,163 @@ class GitHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
                 self.send_header(key, value)
         self.end_headers()
 
-    def _execute_git_command(self, repo_path, service_name, command_options, input_data=None):
-        """Executes a git command for a specific repository."""
-        command = ['git', service_name.replace('git-', ''), '--stateless-rpc'] + command_options + [repo_path]
-        
-        try:
-            proc = subprocess.Popen(
-                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            stdout, stderr = proc.communicate(input=input_data)
+    def _write_chunk(self, data):
+        """
+        Writes one chunk of a 'Transfer-Encoding: chunked' response body, or
+        the bare data for HTTP/1.0 clients, which do not understand chunking.
+        """
+        if self._chunked:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        else:
+            self.wfile.write(data)
 
-            if proc.returncode != 0:
-                print(f"Git command error for '{' '.join(command)}':\n{stderr.decode('utf-8', errors='ignore')}")
-                self.send_error(500, "Git command failed on server.")
-                return None
-            return stdout
+    def _relay_output(self, stdout):
+        """
+        Relays git's stdout to the client until EOF, framed as chunks for
+        HTTP/1.1 clients. Where possible the data is spliced from the pipe
+        into the socket; otherwise it is read and written in READ_BUFFER_SIZE
+        pieces.
+        """
+        use_splice = HAVE_SPLICE
+        if use_splice:
+            # select.poll and FIONREAD are only needed, and only exist
+            # everywhere splice does, to size the spliced chunks.
+            src = stdout.fileno()
+            dst = self.connection.fileno()
+            poller = select.poll()
+            poller.register(src, select.POLLIN)
+            available = array.array('i', [0])
+        # The CRLF closing a spliced chunk is sent together with the header of
+        # the next one, saving a send() per chunk.
+        trailer = b''
+
+        while True:
+            if not use_splice:
+                if trailer:
+                    self.wfile.write(trailer)
+                    trailer = b''
+                data = stdout.read(READ_BUFFER_SIZE)
+                if not data:
+                    return
+                self._write_chunk(data)
+                continue
+
+            # Wait for git to write or exit, then frame exactly what the pipe holds.
+            poller.poll()
+            fcntl.ioctl(src, termios.FIONREAD, available)
+            size = available[0]
+            if not size:
+                self.wfile.write(trailer)
+                return
+            if self._chunked:
+                self.wfile.write(trailer + b'%x\r\n' % size)
+                trailer = b'\r\n'
+            while size and use_splice:
+                try:
+                    size -= os.splice(src, dst, size)
+                except (BrokenPipeError, ConnectionResetError):
+                    raise
+                except OSError:
+                    # splice is not supported here; copy from now on.
+                    use_splice = False
+            while size:
+                data = os.read(src, size)
+                self.wfile.write(data)
+                size -= len(data)
+
+    def _execute_git_command(self, repo_path, service_name, command_options, content_type, input_stream=None, pooled=False):
+        """
+        Executes a git command for a specific repository and streams its
+        output to the client, as a chunked response for HTTP/1.1 clients. input_stream, if given, is
+        copied to git's stdin as it is read. With pooled, the process
+        is taken from GIT_PROCESS_POOL, which is refilled afterwards.
+        """
+        command = _git_command(service_name, command_options, repo_path)
+
+        try:
+            if pooled:
+                proc = GIT_PROCESS_POOL.acquire(service_name, repo_path)
+            else:
+                proc = _spawn_git(command)
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             self.send_error(500, "Internal Server Error.")
-            return None
-            
+            return
+
+        # Feed stdin and drain stderr on helper threads, so git never blocks on
+        # a full pipe while we are busy relaying its stdout.
+        stderr_output = []
+        input_errors = []
+        feeder = threading.Thread(target=_pump, args=(input_stream, proc, input_errors), daemon=True)
+        drainer = threading.Thread(target=lambda: stderr_output.append(proc.stderr.read()), daemon=True)
+        feeder.start()
+        drainer.start()
+
+        def report_failure():
+            drainer.join()
+            stderr = b''.join(stderr_output).decode('utf-8', errors='ignore')
+            print(f"Git command error for '{' '.join(command)}':\n{stderr}")
+
+        try:
+            # Wait for the first output before sending a 200, so a command that
+            # fails outright can still be answered with an error status.
+            chunk = proc.stdout.read(READ_BUFFER_SIZE)
+            if not chunk and proc.wait() != 0:
+                feeder.join()
+                if input_errors:
+                    error = input_errors[0]
+                    print(f"Failed to read request body for '{' '.join(command)}': {error!r}")
+                    if isinstance(error, _BadChunkedBody):
+                        self.send_error(400, "Bad chunked encoding in request")
+                    elif isinstance(error, (EOFError, zlib.error)):
+                        self.send_error(400, "Bad gzipped data in request")
+                    else:
+                        self.close_connection = True
+                    return
+                report_failure()
+                self.send_error(500, "Git command failed on server.")
+                return
+
+            # Chunked framing is HTTP/1.1 only. Older clients get the raw body,
+            # delimited by closing the connection.
+            self._chunked = self.request_version == 'HTTP/1.1'
+            if self._chunked:
+                self._send_headers(200, content_type, {'Transfer-Encoding': 'chunked'})
+            else:
+                self._send_headers(200, content_type, {'Connection': 'close'})
+
+            if chunk:
+                self._write_chunk(chunk)
+                _grow_pipe(proc.stdout)
+                self._relay_output(proc.stdout)
+
+            if proc.wait() != 0:
+                feeder.join()
+                if input_errors:
+                    print(f"Failed to read request body for '{' '.join(command)}': {input_errors[0]!r}")
+                report_failure()
+                # The response is already underway; drop the connection without
+                # the terminating chunk so the client sees it as truncated.
+                self.close_connection = True
+                return
+            if self._chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"Client disconnected during '{' '.join(command)}'.")
+            self.close_connection = True
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+            feeder.join()
+            drainer.join()
+            proc.stderr.close()
+            if pooled:
+                # Spawn the next process now that the response is complete,
+                # keeping git's startup off the following request's path.
+                GIT_PROCESS_POOL.replenish(service_name, repo_path)
+
     def handle_liveness_probe(self):
         """Handles the /healthz/live endpoint. Responds 200 OK if server is running."""
         print(f"Received liveness probe from {self.client_address[0]}")
@@ -169,82 +753,104 @@ class GitHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
             print(f"Readiness probe failed: {error_message}")
             self._send_text_response(503, error_message)
 
-    def process_request(self, service_name_suffix):
-        """Generic handler for both GET and POST for Git operations."""
-        repo_path, error = self.get_repo_path()
+    def process_request(self, path, query, service_name):
+        """
+        Generic handler for both GET and POST for Git operations. The request
+        target is passed in already split into path and query, and
+        service_name is the service addressed by a POST.
+        """
+        repo_path, error = self.get_repo_path(path)
         if error:
             self.send_error(404, error)
             return
 
-        parsed_path = urlparse(self.path)
-        
         if self.command == 'GET':
-            query_params = parse_qs(parsed_path.query)
+            query_params = parse_qs(query)
             service = query_params.get('service', [None])[0]
-            if not service or not parsed_path.path.endswith('/info/refs'):
+            if service not in _SERVICE_PRELUDE or not path.endswith('/info/refs'):
                 self.send_error(404, "Not Found")
                 return
 
             content_type = f'application/x-{service}-advertisement'
-            self._send_headers(200, content_type)
-            header = f'# service={service}\n'
-            encoded_header = f'{len(header) + 4:04x}{header}0000'
-            self.wfile.write(encoded_header.encode('utf-8'))
-            output = self._execute_git_command(repo_path, service, ['--advertise-refs'])
-            if output:
-                self.wfile.write(output)
+            try:
+                body = advertise_refs(repo_path, service)
+            except subprocess.CalledProcessError as e:
+                print(f"Git command error for '{' '.join(e.cmd)}':\n{e.stderr.decode('utf-8', errors='ignore')}")
+                self.send_error(500, "Git command failed on server.")
+                return
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                self.send_error(500, "Internal Server Error.")
+                return
+
+            self._send_headers(200, content_type, {'Content-Length': str(len(body))})
+            # end_headers has already sent the headers; hand the cached body
+            # to the socket in a single call.
+            self.connection.sendall(body)
         
         elif self.command == 'POST':
-            service_name = os.path.basename(parsed_path.path)
-            if service_name != service_name_suffix:
-                 self.send_error(400, "Service mismatch in URL.")
-                 return
-
-            content_length = int(self.headers.get('Content-Length', 0))
-            input_data = self.rfile.read(content_length)
-
-            # Decompress request body if client sent it gzipped
-            if self.headers.get('Content-Encoding') == 'gzip':
-                try:
-                    input_data = gzip.decompress(input_data)
-                except (gzip.BadGzipFile, EOFError):
-                    self.send_error(400, "Bad gzipped data in request")
+            # The body is copied to git's stdin while it is being received, so
+            # it is never held in memory in full. Decompress it on the way if
+            # the client sent it gzipped.
+            if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                body = _ChunkedRequestBody(self.rfile)
+            else:
+                content_length = self.headers.get('Content-Length', '0')
+                if not _CONTENT_LENGTH_RE.fullmatch(content_length):
+                    self.send_error(400, "Invalid Content-Length header")
                     return
-
-            output = self._execute_git_command(repo_path, service_name, [], input_data=input_data)
-            
-            if output is None:
-                # _execute_git_command already sent an error
-                return
-
-            # Now, prepare the response
-            extra_headers = {}
-            # Check if the output from git is gzipped and add header if so
-            if output.startswith(b'\x1f\x8b'):
-                extra_headers['Content-Encoding'] = 'gzip'
+                body = _RequestBody(self.rfile, int(content_length))
+            if self.headers.get('Content-Encoding') == 'gzip':
+                input_stream = _GzipBody(body)
+            else:
+                input_stream = body
 
             content_type = f'application/x-{service_name}-result'
-            self._send_headers(200, content_type, extra_headers)
-            
-            self.wfile.write(output)
+            with GIT_PROCESS_SLOTS:
+                self._execute_git_command(
+                    repo_path, service_name, [], content_type, input_stream=input_stream,
+                    pooled=service_name == 'git-upload-pack'
+                )
+            if body.remaining:
+                # git stopped reading early; the rest of the body is still in
+                # the socket, so the connection cannot be reused.
+                self.close_connection = True
 
     def do_GET(self):
         """Handle GET requests, routing health checks or Git operations."""
-        path = urlparse(self.path).path
+        # The URL layout is fixed, so plain string splits replace urlparse.
+        path, _, query = self.path.partition('?')
         if path == '/healthz/live':
             self.handle_liveness_probe()
         elif path == '/healthz/ready':
             self.handle_readiness_probe()
         else:
-            self.process_request(None)
+            self.process_request(path, query, None)
 
     def do_POST(self):
         """Handle POST requests for Git operations."""
-        service_name = os.path.basename(urlparse(self.path).path)
+        path, _, query = self.path.partition('?')
+        service_name = os.path.basename(path)
         if service_name not in ('git-upload-pack', 'git-receive-pack'):
             self.send_error(404, "Service not found.")
             return
-        self.process_request(service_name)
+        self.process_request(path, query, service_name)
+
+class GitHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server that tunes the sockets of accepted connections."""
+    # Handler threads must not keep the process alive on shutdown.
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def get_request(self):
+        request, client_address = super().get_request()
+        if SEND_BUFFER_SIZE:
+            # Larger buffers help clones over high-latency links. Note that
+            # Linux caps the value at net.core.wmem_max and stops autotuning
+            # the buffer once it is set explicitly.
+            request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+        return request, client_address
 
 # --- Main Server Execution ---
 if __name__ == "__main__":
@@ -255,7 +861,9 @@ if __name__ == "__main__":
         print("Server cannot start due to repository setup failure.")
         exit(1)
 
-    with socketserver.TCPServer((HOST, PORT), GitHTTPRequestHandler) as server:
+    # Each connection is handled on its own thread, so a long clone or push
+    # no longer blocks other clients or the health probes.
+    with GitHTTPServer((HOST, PORT), GitHTTPRequestHandler) as server:
         print(f"Serving {len(REPO_MAP)} Git repositories on http://{HOST}:{PORT}")
         for name in REPO_MAP:
             print(f" -> http://{HOST}:{PORT}/{name}")